@@ -7,23 +7,43 @@ from __future__ import annotations
 
 import json
 import os
+import socket
+import time
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
 import streamlit as st
 import yfinance as yf
 
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # Fall back to stdlib json
+    orjson = None
+
 load_dotenv()
 
 DATA_DIR = Path(os.getenv("DATA_DIR", "data"))
 STATE_FILE = DATA_DIR / "simulator_state.json"
 ENGINE_STATUS_FILE = DATA_DIR / "engine_status.json"
+CONTROL_SOCKET = DATA_DIR / "engine.sock"
+SESSION_TTL_SECONDS = 30  # Reuse state/status/prices across reruns for this long
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _read_json(path: str, mtime_ns: int) -> dict:
+    """Parse a JSON file. Cached across reruns per (path, mtime); parse errors are not cached."""
+    raw = Path(path).read_bytes()
+    return orjson.loads(raw) if orjson else json.loads(raw)
 
 
 def load_state() -> dict:
-    """Load simulator state from JSON."""
-    if not STATE_FILE.exists():
+    """Load simulator state from JSON. Re-parses only when the file changes."""
+    try:
+        mtime = STATE_FILE.stat().st_mtime_ns
+    except OSError:
         return {
             "virtual_balance": 100_000.0,
             "initial_balance": 100_000.0,
@@ -31,36 +51,62 @@ def load_state() -> dict:
             "trade_history": [],
         }
     try:
-        with open(STATE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return _read_json(str(STATE_FILE), mtime)
     except Exception:
         return {"virtual_balance": 100_000.0, "initial_balance": 100_000.0, "positions": {}, "trade_history": []}
 
 
 def load_engine_status() -> bool:
-    """Return True if engine is set to running."""
-    if not ENGINE_STATUS_FILE.exists():
+    """Return True if engine is set to running. Re-parses only when the file changes."""
+    try:
+        mtime = ENGINE_STATUS_FILE.stat().st_mtime_ns
+    except OSError:
         return False
     try:
-        with open(ENGINE_STATUS_FILE, "r", encoding="utf-8") as f:
-            d = json.load(f)
-        return d.get("running", False)
+        return _read_json(str(ENGINE_STATUS_FILE), mtime).get("running", False)
     except Exception:
         return False
 
 
+def notify_engine(running: bool) -> None:
+    """
+    Wake the live engine over its control socket, if it is listening.
+    Best effort: engine_status.json is the source of truth, so a failed push only
+    delays pickup until the engine's next check.
+    """
+    if not hasattr(socket, "AF_UNIX") or not CONTROL_SOCKET.exists():
+        return
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(1.0)
+            sock.connect(str(CONTROL_SOCKET))
+            sock.sendall(b"START\n" if running else b"STOP\n")
+    except OSError:
+        pass  # Engine re-reads the status file before every cycle
+
+
 def save_engine_status(running: bool) -> None:
-    """Persist engine running state."""
+    """Persist engine running state and notify the live engine."""
     DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with open(ENGINE_STATUS_FILE, "w", encoding="utf-8") as f:
-        json.dump({"running": running}, f, indent=2)
+    status = {"running": running}
+    if orjson:
+        ENGINE_STATUS_FILE.write_bytes(orjson.dumps(status, option=orjson.OPT_INDENT_2))
+    else:
+        ENGINE_STATUS_FILE.write_bytes(json.dumps(status, indent=2).encode("utf-8"))
+    notify_engine(running)
+
 
+def _normalize_is(ticker: str) -> str:
+    """Yahoo symbol for a BIST ticker (upper-case, .IS suffix)."""
+    t = ticker.upper()
+    return t if t.endswith(".IS") else f"{t}.IS"
 
+
+@st.cache_data(ttl=60, show_spinner=False)
 def get_current_price(ticker: str) -> float:
     """Fetch current price for ticker."""
     try:
-        t = ticker if ticker.endswith(".IS") else f"{ticker}.IS"
-        hist = yf.Ticker(t).history(period="5d")
+        hist = yf.Ticker(_normalize_is(ticker)).history(period="1d")
         if hist.empty:
             return 0.0
         return float(hist["Close"].iloc[-1])
@@ -68,6 +114,35 @@ def get_current_price(ticker: str) -> float:
         return 0.0
 
 
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_prices(tickers: list[str]) -> dict[str, float]:
+    """Fetch last close for all tickers in one batched request."""
+    if not tickers:
+        return {}
+    symbols = {t: _normalize_is(t) for t in tickers}
+    try:
+        data = yf.download(
+            list(symbols.values()),
+            period="1d",
+            group_by="ticker",
+            threads=True,
+            progress=False,
+        )
+    except Exception:
+        data = None
+    if data is None or data.empty:
+        return {t: get_current_price(t) for t in tickers}
+
+    prices = {}
+    for ticker, sym in symbols.items():
+        try:
+            close = data[sym]["Close"].dropna()
+            prices[ticker] = float(close.iloc[-1]) if not close.empty else 0.0
+        except Exception:
+            prices[ticker] = 0.0
+    return prices
+
+
 def main() -> None:
     st.set_page_config(
         page_title="Sentinel-BIST",
@@ -79,17 +154,35 @@ def main() -> None:
     st.title("📊 Sentinel-BIST")
     st.caption("Silent Autonomous Mode | Local Stop switch | Monitor via Midas")
 
-    state = load_state()
+    if st.button("🔄 Refresh"):
+        fetch_prices.clear()
+        get_current_price.clear()
+        st.session_state.last_fetch = 0.0
+
+    # Widget reruns within SESSION_TTL_SECONDS reuse the last fetch
+    if time.time() - st.session_state.get("last_fetch", 0.0) > SESSION_TTL_SECONDS:
+        st.session_state.state = load_state()
+        st.session_state.engine_running = load_engine_status()
+        st.session_state.prices = fetch_prices(list(st.session_state.state.get("positions", {})))
+        st.session_state.last_fetch = time.time()
+
+    state = st.session_state.state
     balance = state.get("virtual_balance", 0.0)
     initial = state.get("initial_balance", 100_000.0)
     positions = state.get("positions", {})
+    price_map = st.session_state.prices
 
-    # Position value (mark-to-market)
-    position_value = 0.0
-    for ticker, pos in positions.items():
-        qty = pos.get("quantity", 0)
-        price = get_current_price(ticker)
-        position_value += qty * price
+    # Position value (mark-to-market), one vectorized pass over all positions
+    qtys = np.array([pos.get("quantity", 0) for pos in positions.values()], dtype=float)
+    entries = np.array([pos.get("entry_price", 0) for pos in positions.values()], dtype=float)
+    prices = np.array([price_map.get(t, 0.0) for t in positions], dtype=float)
+    values = qtys * prices
+    cost_bases = qtys * entries
+    pos_pnls = values - cost_bases
+    pos_pnl_pcts = np.divide(
+        100 * pos_pnls, cost_bases, out=np.zeros_like(pos_pnls), where=cost_bases > 0
+    )
+    position_value = float(values.sum())
 
     total = balance + position_value
     pnl = total - initial
@@ -113,39 +206,45 @@ def main() -> None:
     if not positions:
         st.info("No active positions.")
     else:
-        rows = []
-        for ticker, pos in positions.items():
-            qty = pos.get("quantity", 0)
-            entry = pos.get("entry_price", 0)
-            current = get_current_price(ticker)
-            value = qty * current
-            cost_basis = qty * entry
-            pos_pnl = value - cost_basis
-            pos_pnl_pct = 100 * pos_pnl / cost_basis if cost_basis > 0 else 0
-            rows.append({
-                "Ticker": ticker,
-                "Quantity": f"{qty:,.0f}",
-                "Entry": f"{entry:,.2f} TL",
-                "Current": f"{current:,.2f} TL",
-                "Value": f"{value:,.2f} TL",
-                "P&L": f"{pos_pnl:+,.2f} ({pos_pnl_pct:+.1f}%)",
-            })
-        st.dataframe(rows, use_container_width=True, hide_index=True)
+        df = pd.DataFrame({
+            "Ticker": list(positions),
+            "Quantity": qtys,
+            "Entry": entries,
+            "Current": prices,
+            "Value": values,
+            "P&L": pos_pnls,
+            "P&L %": pos_pnl_pcts,
+        })
+        st.dataframe(
+            df,
+            column_config={
+                "Quantity": st.column_config.NumberColumn(format="localized"),
+                "Entry": st.column_config.NumberColumn("Entry (TL)", format="localized"),
+                "Current": st.column_config.NumberColumn("Current (TL)", format="localized"),
+                "Value": st.column_config.NumberColumn("Value (TL)", format="localized"),
+                "P&L": st.column_config.NumberColumn("P&L (TL)", format="localized"),
+                "P&L %": st.column_config.NumberColumn(format="%+.1f%%"),
+            },
+            use_container_width=True,
+            hide_index=True,
+        )
 
     st.divider()
 
     # --- Stop Switch ---
     st.subheader("Engine Control (Stop Switch)")
-    engine_running = load_engine_status()
+    engine_running = st.session_state.engine_running
 
     col_a, col_b, _ = st.columns([1, 1, 2])
     with col_a:
         if st.button("▶️ Start Engine", type="primary", use_container_width=True):
             save_engine_status(True)
+            st.session_state.last_fetch = 0.0
             st.rerun()
     with col_b:
         if st.button("⏹️ Stop Engine", type="secondary", use_container_width=True):
             save_engine_status(False)
+            st.session_state.last_fetch = 0.0
             st.rerun()
 
     status_color = "green" if engine_running else "red"
@@ -7,11 +7,15 @@ Enforces max 3 trades per day.
 
 from __future__ import annotations
 
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import date
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 import yfinance as yf
 
 from analyzers.technical import TechnicalAnalyzer
@@ -19,6 +23,25 @@ from analyzers.sentiment import SentimentAnalyzer
 from broker.simulator import VirtualBroker
 
 
+@lru_cache(maxsize=64)
+def _normalize_is(ticker: str) -> str:
+    """Yahoo symbol for a BIST ticker (upper-case, .IS suffix)."""
+    t = ticker.upper()
+    return t if t.endswith(".IS") else f"{t}.IS"
+
+
+@lru_cache(maxsize=128)
+def _fetch_last_close(symbol: str, minute_bucket: int) -> Optional[float]:
+    """Last close for symbol; memoized per wall-clock minute via minute_bucket."""
+    try:
+        hist = yf.Ticker(symbol).history(period="1d")
+        if hist.empty:
+            return None
+        return float(hist["Close"].iloc[-1])
+    except Exception:
+        return None
+
+
 @dataclass
 class DecisionResult:
     """Result of hybrid decision evaluation."""
@@ -26,13 +49,24 @@ class DecisionResult:
     action: str  # "BUY", "SELL", "HOLD"
     ticker: str
     T_score: float
-    S_score: float
+    S_score: Optional[float]  # None if sentiment was skipped (T alone ruled out alignment)
     confidence_score: float  # Adjusted for Animal Spirits risk
     aligned: bool
     daily_trades_left: int
     reason: str = ""
 
 
+@dataclass
+class TickerSignals:
+    """Pre-fetched Technical (T) and Sentiment (S) inputs for one ticker."""
+
+    T_score: Optional[float]  # None if technical analysis failed
+    S_score: Optional[float]  # None if skipped because T alone ruled out alignment
+    animal_spirits_risk: bool
+    technical_error: str = ""
+    direction: str = "neutral"  # "bullish", "bearish" or "neutral" after classification
+
+
 class HybridDecisionEngine:
     """
     Hybrid Decision Engine: T (Technical) + S (Sentiment).
@@ -47,6 +81,8 @@ class HybridDecisionEngine:
     ALIGNMENT_THRESHOLD = 0.2
     DRAWDOWN_THRESHOLD = 0.03  # MIT Sloan: 3% drop from peak triggers SELL
     ANIMAL_SPIRITS_PENALTY = 0.30  # Reduce confidence by 30% when risk keywords present
+    MAX_WORKERS = 16  # Concurrent T/S fetches per cycle (network-bound)
+    PRICE_CACHE_MAX_AGE = timedelta(minutes=5)  # Batched prices older than this are refetched
 
     def __init__(
         self,
@@ -59,6 +95,8 @@ class HybridDecisionEngine:
         self._trade_counter_date: Optional[date] = None
         self._trade_count_today: int = 0
         self._peak_prices: dict[str, float] = {}  # MIT Sloan: track peak per position
+        self._price_cache: dict[str, float] = {}  # Last close per .IS symbol, primed per cycle
+        self._price_cache_stamp: Optional[datetime] = None
 
     def _refresh_daily_counter(self) -> None:
         """Reset trade count at start of new day."""
@@ -66,6 +104,8 @@ class HybridDecisionEngine:
         if self._trade_counter_date != today:
             self._trade_counter_date = today
             self._trade_count_today = 0
+            self._price_cache.clear()
+            self._price_cache_stamp = None
 
     def _increment_trade_count(self) -> bool:
         """Increment trade count; return True if under limit."""
@@ -82,16 +122,41 @@ class HybridDecisionEngine:
 
     def _get_current_price(self, ticker: str) -> Optional[float]:
         """Fetch current (last close) price for ticker."""
-        t = ticker.upper()
-        if not t.endswith(".IS"):
-            t = f"{t}.IS"
+        t = _normalize_is(ticker)
+        stamp = self._price_cache_stamp
+        if stamp is not None and datetime.now() - stamp <= self.PRICE_CACHE_MAX_AGE:
+            cached = self._price_cache.get(t)
+            if cached is not None:
+                return cached
+        return _fetch_last_close(t, int(time.time() // 60))
+
+    def _prime_price_cache(self, tickers: list[str]) -> None:
+        """Fetch last close for all tickers in one batched request."""
+        self._refresh_daily_counter()
+        symbols = list(dict.fromkeys(_normalize_is(t) for t in tickers))
+        self._price_cache.clear()
+        if not symbols:
+            return
         try:
-            hist = yf.Ticker(t).history(period="5d")
-            if hist.empty:
-                return None
-            return float(hist["Close"].iloc[-1])
+            data = yf.download(
+                symbols,
+                period="2d",
+                group_by="ticker",
+                threads=True,
+                progress=False,
+            )
         except Exception:
-            return None
+            return
+        if data is None or data.empty:
+            return
+        for sym in symbols:
+            try:
+                close = data[sym]["Close"].dropna()
+            except Exception:
+                continue
+            if not close.empty:
+                self._price_cache[sym] = float(close.iloc[-1])
+        self._price_cache_stamp = datetime.now()
 
     def _check_drawdown_sell(self, ticker: str) -> bool:
         """
@@ -126,10 +191,70 @@ class HybridDecisionEngine:
             return True, "bearish"
         return False, "neutral"
 
+    def _prefetch(self, ticker: str) -> TickerSignals:
+        """
+        Fetch T and S for ticker. Network-bound; safe to run in a worker thread.
+        T is fetched first: the (news-scraping) sentiment call is skipped when
+        T alone rules out alignment.
+        """
+        technical_error = ""
+        try:
+            T, _ = self.technical.analyze(ticker)
+        except Exception as e:
+            T = None
+            technical_error = str(e)
+        # Confidence <= 1.0 only raises the threshold, so |T| <= threshold can never align
+        if T is not None and abs(T) <= self.ALIGNMENT_THRESHOLD:
+            return TickerSignals(T, None, False)
+        try:
+            S, has_animal_spirits_risk = self.sentiment.score_for_ticker_with_risk(ticker)
+        except Exception:
+            S = 0.0
+            has_animal_spirits_risk = False
+        return TickerSignals(T, S, has_animal_spirits_risk, technical_error=technical_error)
+
+    def _prefetch_all(self, tickers: list[str]) -> dict[str, TickerSignals]:
+        """Fetch T and S for all tickers concurrently."""
+        unique = list(dict.fromkeys(tickers))
+        if not unique:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(unique))) as ex:
+            return dict(zip(unique, ex.map(self._prefetch, unique)))
+
+    def _classify_all(self, signals: dict[str, TickerSignals]) -> None:
+        """Set alignment direction for all signals in one vectorized pass."""
+        if not signals:
+            return
+        sigs = list(signals.values())
+        T = np.array([s.T_score if s.T_score is not None else np.nan for s in sigs])
+        S = np.array([s.S_score if s.S_score is not None else np.nan for s in sigs])
+        risk = np.array([s.animal_spirits_risk for s in sigs])
+        thresh = self.ALIGNMENT_THRESHOLD / np.where(risk, 1.0 - self.ANIMAL_SPIRITS_PENALTY, 1.0)
+        bullish = (T > thresh) & (S > thresh)
+        bearish = (T < -thresh) & (S < -thresh)
+        for i in np.flatnonzero(bullish | bearish):
+            sigs[i].direction = "bullish" if bullish[i] else "bearish"
+
+    def _signals_for(
+        self,
+        ticker: str,
+        signals: Optional[dict[str, TickerSignals]],
+    ) -> TickerSignals:
+        """Return pre-fetched signals for ticker, fetching inline on a miss."""
+        if signals is not None and ticker in signals:
+            return signals[ticker]
+        sig = self._prefetch(ticker)
+        confidence = 1.0 - self.ANIMAL_SPIRITS_PENALTY if sig.animal_spirits_risk else 1.0
+        T = sig.T_score if sig.T_score is not None else 0.0
+        S = sig.S_score if sig.S_score is not None else 0.0
+        _, sig.direction = self._aligned(T, S, confidence)
+        return sig
+
     def evaluate(
         self,
         ticker: str,
         current_holding: Optional[str] = None,
+        signals: Optional[dict[str, TickerSignals]] = None,
     ) -> DecisionResult:
         """
         Evaluate whether to BUY, SELL, or HOLD.
@@ -174,29 +299,19 @@ class HybridDecisionEngine:
             )
 
         # --- Sentiment with Animal Spirits risk check ---
-        try:
-            S, has_animal_spirits_risk = self.sentiment.score_for_ticker_with_risk(ticker)
-        except Exception:
-            S = 0.0
-            has_animal_spirits_risk = False
+        sig = self._signals_for(ticker, signals)
+        S = sig.S_score
 
         # Keynes' Animal Spirits: Reduce confidence 30% if risk keywords present
-        confidence = 1.0 - self.ANIMAL_SPIRITS_PENALTY if has_animal_spirits_risk else 1.0
+        confidence = 1.0 - self.ANIMAL_SPIRITS_PENALTY if sig.animal_spirits_risk else 1.0
 
         # --- Downside risk: analyze current holding for bearish signals ---
         if current_holding:
-            try:
-                T_hold, _ = self.technical.analyze(current_holding)
-            except Exception:
-                T_hold = 0.0
-            try:
-                S_hold, risk_hold = self.sentiment.score_for_ticker_with_risk(current_holding)
-                conf_hold = 1.0 - self.ANIMAL_SPIRITS_PENALTY if risk_hold else 1.0
-            except Exception:
-                S_hold = 0.0
-                conf_hold = 1.0
-            aligned_hold, dir_hold = self._aligned(T_hold, S_hold, conf_hold)
-            if aligned_hold and dir_hold == "bearish":
+            hold = self._signals_for(current_holding, signals)
+            T_hold = hold.T_score if hold.T_score is not None else 0.0
+            S_hold = hold.S_score
+            conf_hold = 1.0 - self.ANIMAL_SPIRITS_PENALTY if hold.animal_spirits_risk else 1.0
+            if hold.direction == "bearish":
                 if self._increment_trade_count():
                     return DecisionResult(
                         action="SELL",
@@ -220,9 +335,8 @@ class HybridDecisionEngine:
                 )
 
         # --- Bullish alignment for ticker: consider BUY ---
-        try:
-            T, _ = self.technical.analyze(ticker)
-        except Exception as e:
+        T = sig.T_score
+        if T is None:
             return DecisionResult(
                 action="HOLD",
                 ticker=ticker,
@@ -231,11 +345,11 @@ class HybridDecisionEngine:
                 confidence_score=confidence,
                 aligned=False,
                 daily_trades_left=remaining,
-                reason=f"Technical analysis failed: {e}",
+                reason=f"Technical analysis failed: {sig.technical_error}",
             )
 
-        aligned, direction = self._aligned(T, S, confidence)
-        if aligned and direction == "bullish":
+        aligned = sig.direction != "neutral"
+        if sig.direction == "bullish":
             if self._increment_trade_count():
                 return DecisionResult(
                     action="BUY",
@@ -249,6 +363,12 @@ class HybridDecisionEngine:
                     + (" (Confidence reduced: Animal Spirits risk)" if confidence < 1.0 else ""),
                 )
 
+        if S is None:
+            note = " (Sentiment skipped: |T| below alignment threshold)"
+        elif confidence < 1.0:
+            note = " (Confidence reduced: enflasyon/belirsizlik in news)"
+        else:
+            note = ""
         return DecisionResult(
             action="HOLD",
             ticker=ticker,
@@ -257,8 +377,7 @@ class HybridDecisionEngine:
             confidence_score=confidence,
             aligned=aligned,
             daily_trades_left=remaining,
-            reason="T and S not aligned for trade."
-            + (" (Confidence reduced: enflasyon/belirsizlik in news)" if confidence < 1.0 else ""),
+            reason="T and S not aligned for trade." + note,
         )
 
     def run_cycle(
@@ -268,13 +387,23 @@ class HybridDecisionEngine:
     ) -> list[DecisionResult]:
         """
         Run one evaluation cycle over tickers.
+        T/S inputs are fetched concurrently up front; decisions then run
+        sequentially so trade-count and peak-price state stay consistent.
         Optionally execute via virtual broker (paper trade).
         """
         results = []
         holding = current_holding
 
+        signals: dict[str, TickerSignals] = {}
+        if self._trades_remaining() > 0:
+            cycle_tickers = tickers + ([holding] if holding else [])
+            signals = self._prefetch_all(cycle_tickers)
+            self._classify_all(signals)
+            # Primed after the (slow) T/S prefetch so prices are fresh when decisions read them
+            self._prime_price_cache(cycle_tickers)
+
         for ticker in tickers:
-            res = self.evaluate(ticker, current_holding=holding)
+            res = self.evaluate(ticker, current_holding=holding, signals=signals)
             results.append(res)
 
             if res.action == "BUY" and self.broker:
@@ -7,13 +7,22 @@ from __future__ import annotations
 
 import json
 import os
+import socket
+import socketserver
+import threading
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Optional
 from zoneinfo import ZoneInfo
 
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # Fall back to stdlib json
+    orjson = None
+
 from engine import HybridDecisionEngine
 from broker.simulator import VirtualBroker
 from analyzers.technical import BIST30_TICKERS
@@ -24,75 +33,179 @@ ISTANBUL = ZoneInfo("Europe/Istanbul")
 DATA_DIR = Path(os.getenv("DATA_DIR", "data"))
 STATE_FILE = DATA_DIR / "simulator_state.json"
 ENGINE_STATUS_FILE = DATA_DIR / "engine_status.json"
+CONTROL_SOCKET = DATA_DIR / "engine.sock"
 
 BIST_START = (9, 55)   # 09:55
 BIST_END = (18, 10)    # 18:10
+_BIST_START_MIN = BIST_START[0] * 60 + BIST_START[1]
+_BIST_END_MIN = BIST_END[0] * 60 + BIST_END[1]
 INTERVAL_MINUTES = 15
+IDLE_POLL_SECONDS = 1  # Poll the Stop switch this often while idle or waiting
+
+# Parsed engine_status.json, keyed on file mtime
+_status_cache = {"mtime": 0, "val": False}
+
+# Set when the dashboard pushes a Start/Stop over CONTROL_SOCKET; the file stays the source of truth
+_wake = threading.Event()
+_control_server: Optional[socketserver.BaseServer] = None
 
 
 def is_engine_running() -> bool:
-    """Check if dashboard has enabled the engine."""
-    if not ENGINE_STATUS_FILE.exists():
+    """Check if dashboard has enabled the engine. Re-parses only when the file changes."""
+    try:
+        mtime = ENGINE_STATUS_FILE.stat().st_mtime_ns
+    except OSError:
         return False
+    if mtime == _status_cache["mtime"]:
+        return _status_cache["val"]
     try:
-        with open(ENGINE_STATUS_FILE, "r", encoding="utf-8") as f:
-            d = json.load(f)
-        return d.get("running", False)
+        raw = ENGINE_STATUS_FILE.read_bytes()
+        d = orjson.loads(raw) if orjson else json.loads(raw)
+        running = d.get("running", False)
     except Exception:
         return False
+    _status_cache.update(mtime=mtime, val=running)
+    return running
 
 
-def is_bist_trading_hours() -> bool:
-    """Return True if current time is within BIST hours (Istanbul)."""
-    now = datetime.now(ISTANBUL)
-    h, m = now.hour, now.minute
-    current_minutes = h * 60 + m
-    start_minutes = BIST_START[0] * 60 + BIST_START[1]
-    end_minutes = BIST_END[0] * 60 + BIST_END[1]
-    return start_minutes <= current_minutes < end_minutes
+class _ControlHandler(socketserver.StreamRequestHandler):
+    """Wake the main loop on a START/STOP command from the dashboard."""
 
+    def handle(self) -> None:
+        command = self.rfile.readline().strip().upper()
+        if command in (b"START", b"STOP"):
+            _wake.set()
 
-def run_one_cycle() -> None:
-    """Run one evaluation cycle. Silent autonomous mode — no external alerts."""
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-    broker = VirtualBroker(
-        initial_balance=100_000.0,
-        data_path=STATE_FILE,
+def _control_socket_in_use() -> bool:
+    """True if another engine is already listening on CONTROL_SOCKET."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(1.0)
+            sock.connect(str(CONTROL_SOCKET))
+        return True
+    except OSError:
+        return False
+
+
+def start_control_server() -> None:
+    """Listen for dashboard wake-ups on CONTROL_SOCKET (POSIX only)."""
+    global _control_server
+    if not hasattr(socketserver, "ThreadingUnixStreamServer"):
+        return
+    if CONTROL_SOCKET.exists() and _control_socket_in_use():
+        print(f"Control socket in use by another engine; polling {ENGINE_STATUS_FILE.name}")
+        return
+    try:
+        CONTROL_SOCKET.unlink(missing_ok=True)  # Stale socket from an unclean exit
+        server = socketserver.ThreadingUnixStreamServer(str(CONTROL_SOCKET), _ControlHandler)
+    except OSError as e:
+        print(f"Control socket unavailable ({e}); polling {ENGINE_STATUS_FILE.name}")
+        return
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _control_server = server
+
+
+def stop_control_server() -> None:
+    """Close the control socket and remove its file."""
+    global _control_server
+    if _control_server is None:
+        return
+    _control_server.shutdown()
+    _control_server.server_close()
+    _control_server = None
+    CONTROL_SOCKET.unlink(missing_ok=True)
+
+
+def engine_enabled() -> bool:
+    """Start/Stop state, always read from the status file (a single stat() when unchanged)."""
+    return is_engine_running()
+
+
+def wait_for_command(timeout: float) -> None:
+    """
+    Sleep up to timeout seconds, returning early when a Start/Stop command arrives.
+    Without the control socket, sleeps at most IDLE_POLL_SECONDS so the caller re-polls the file.
+    """
+    if _control_server is not None:
+        if _wake.wait(timeout):
+            _wake.clear()
+    else:
+        time.sleep(min(IDLE_POLL_SECONDS, timeout))
+
+
+def is_bist_trading_hours(now: datetime) -> bool:
+    """Return True if now (Istanbul time) is within BIST hours."""
+    return _BIST_START_MIN <= now.hour * 60 + now.minute < _BIST_END_MIN
+
+
+def seconds_until_next_run(now: datetime) -> float:
+    """Seconds from now until the next INTERVAL_MINUTES wall-clock boundary."""
+    next_run = now.replace(second=0, microsecond=0) + timedelta(
+        minutes=INTERVAL_MINUTES - now.minute % INTERVAL_MINUTES
     )
-    engine = HybridDecisionEngine(broker=broker, data_path=DATA_DIR)
+    return (next_run - now).total_seconds()
+
+
+def sleep_until_next_run() -> None:
+    """Sleep until the next interval boundary; wake early if the engine is stopped."""
+    deadline = time.monotonic() + seconds_until_next_run(datetime.now(ISTANBUL))
+    while engine_enabled():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        wait_for_command(remaining)
+
+
+def run_one_cycle(broker: VirtualBroker, engine: HybridDecisionEngine) -> None:
+    """Run one evaluation cycle. Silent autonomous mode — no external alerts."""
+    engine._refresh_daily_counter()
 
     tickers = list(BIST30_TICKERS)
-    current_holding = list(broker.positions.keys())[0] if broker.positions else None
+    current_holding = next(iter(broker.positions), None)
 
     engine.run_cycle(tickers, current_holding=current_holding)
 
 
 def main() -> None:
-    """Live loop: run every 15 min during BIST hours when engine is enabled."""
+    """Live loop: run on each 15-min mark during BIST hours when engine is enabled."""
     print("Sentinel-BIST | Silent Autonomous Mode")
     print("BIST hours: 09:55 - 18:10 Istanbul | Max 3 trades/day")
     print("Stop switch: streamlit run app.py")
     print("-" * 50)
 
-    while True:
-        now = datetime.now(ISTANBUL)
-        if is_engine_running() and is_bist_trading_hours():
-            print(f"[{now.strftime('%H:%M:%S')}] Running cycle...")
-            try:
-                run_one_cycle()
-            except Exception as e:
-                print(f"  Error: {e}")
-        else:
-            if not is_engine_running():
-                status = "Engine stopped (dashboard)"
-            else:
-                status = "Outside BIST hours"
-            print(f"[{now.strftime('%H:%M:%S')}] Idle - {status}")
+    # Built once so peak prices, trade counts and analyzer state survive across cycles
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    broker = VirtualBroker(
+        initial_balance=100_000.0,
+        data_path=STATE_FILE,
+    )
+    engine = HybridDecisionEngine(broker=broker, data_path=DATA_DIR)
+    start_control_server()
 
-        # Sleep until next 15-min mark
-        sleep_seconds = INTERVAL_MINUTES * 60
-        time.sleep(sleep_seconds)
+    idle_status = None
+    try:
+        while True:
+            now = datetime.now(ISTANBUL)
+            running = engine_enabled()
+            if running and is_bist_trading_hours(now):
+                idle_status = None
+                print(f"[{now.strftime('%H:%M:%S')}] Running cycle...")
+                try:
+                    run_one_cycle(broker, engine)
+                except Exception as e:
+                    print(f"  Error: {e}")
+                # Sleep until next 15-min mark
+                sleep_until_next_run()
+            else:
+                status = "Outside BIST hours" if running else "Engine stopped (dashboard)"
+                if status != idle_status:
+                    print(f"[{now.strftime('%H:%M:%S')}] Idle - {status}")
+                    idle_status = status
+                wait_for_command(IDLE_POLL_SECONDS)
+    finally:
+        stop_control_server()
 
 
 if __name__ == "__main__":